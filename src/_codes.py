@@ -0,0 +1,7 @@
+"""
+SubCode label patterns shared by code discovery and the code-universe build.
+"""
+
+# Case-insensitive RE2 pattern for IT-related SubCode labels. "it" has to be a
+# whole word: as a bare substring it also matches "audit", "credit" and "benefit"
+IT_LABEL_REGEX = r"(?i)\bit\b|digital|technology|information|computer|software|hardware|system"
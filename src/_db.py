@@ -0,0 +1,21 @@
+"""
+DuckDB connection and CSV helpers shared by the analysis and discovery scripts.
+"""
+
+from pathlib import Path
+
+import duckdb
+
+DB_PATH = Path("Data/canonical/tru_tac.duckdb")
+
+
+def get_con(db_path=DB_PATH):
+    """Open a new read-only connection; the caller closes it."""
+    return duckdb.connect(str(db_path), read_only=True)
+
+
+def write_csv(con, df, path):
+    """Write a DataFrame to a CSV file with DuckDB's COPY on the given connection."""
+    con.register('csv_out', df)
+    con.execute(f"COPY csv_out TO '{Path(path).as_posix()}' (HEADER, DELIMITER ',')")
+    con.unregister('csv_out')
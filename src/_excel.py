@@ -0,0 +1,10 @@
+"""
+Excel reader engine shared by the scripts that parse the TAC workbooks.
+"""
+
+# python-calamine (Rust) parses xlsx far faster than openpyxl; use it when installed
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE = "calamine"
+except ImportError:
+    EXCEL_ENGINE = "openpyxl"
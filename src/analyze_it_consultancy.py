@@ -10,10 +10,16 @@ Analyzes:
 
 import duckdb
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
+import sys
 import warnings
+
+from _db import write_csv
+
 warnings.filterwarnings('ignore')
 
 # Configuration
@@ -41,56 +47,51 @@ print("\n" + "=" * 80)
 print("STEP 1: IDENTIFYING RELEVANT SUBCODES")
 print("=" * 80)
 
+# The code lists and the fact views filtered to them are built once by
+# build_code_universe.py
+tables = {t for t, in con.execute("SHOW TABLES").fetchall()}
+missing = [t for t in ('it_code_universe', 'consultancy_code_universe', 'intangible_code_universe',
+                       'v_fact_it', 'v_fact_consultancy')
+           if t not in tables]
+if missing:
+    print(f"\n❌ Missing tables: {missing}")
+    print("Run: python src/build_code_universe.py")
+    sys.exit(1)
+
 print("\n[1/3] Searching for IT-related subcodes...")
 
-# Search for IT-related subcodes in the dimension table
+# IT-related subcodes
 it_subcodes_query = """
 SELECT DISTINCT SubCode, subcode_label, WorkSheetName
-FROM dim_tac_subcodes
-WHERE LOWER(subcode_label) LIKE '%it %'
-   OR LOWER(subcode_label) LIKE '% it%'
-   OR LOWER(subcode_label) LIKE '%digital%'
-   OR LOWER(subcode_label) LIKE '%technology%'
-   OR LOWER(subcode_label) LIKE '%information%'
-   OR LOWER(subcode_label) LIKE '%computer%'
-   OR LOWER(subcode_label) LIKE '%software%'
-   OR LOWER(subcode_label) LIKE '%hardware%'
-   OR LOWER(subcode_label) LIKE '%system%'
+FROM it_code_universe
 ORDER BY WorkSheetName, SubCode
 """
 
 it_subcodes = con.execute(it_subcodes_query).fetchdf()
 print(f"\nFound {len(it_subcodes)} IT-related subcodes:")
 print(it_subcodes.to_string(index=False))
-it_subcodes.to_csv(OUTPUT_DIR / "01_it_subcodes_identified.csv", index=False)
+write_csv(con, it_subcodes, OUTPUT_DIR / "01_it_subcodes_identified.csv")
 
 print("\n[2/3] Searching for consultancy-related subcodes...")
 
-# Search for consultancy subcodes
+# Consultancy subcodes
 consultancy_subcodes_query = """
 SELECT DISTINCT SubCode, subcode_label, WorkSheetName
-FROM dim_tac_subcodes
-WHERE LOWER(subcode_label) LIKE '%consult%'
-   OR LOWER(subcode_label) LIKE '%advisory%'
-   OR LOWER(subcode_label) LIKE '%professional%'
+FROM consultancy_code_universe
 ORDER BY WorkSheetName, SubCode
 """
 
 consultancy_subcodes = con.execute(consultancy_subcodes_query).fetchdf()
 print(f"\nFound {len(consultancy_subcodes)} consultancy-related subcodes:")
 print(consultancy_subcodes.to_string(index=False))
-consultancy_subcodes.to_csv(OUTPUT_DIR / "02_consultancy_subcodes_identified.csv", index=False)
+write_csv(con, consultancy_subcodes, OUTPUT_DIR / "02_consultancy_subcodes_identified.csv")
 
 print("\n[3/3] Searching for intangible assets (software) subcodes...")
 
 # Software is typically in intangibles
 intangible_subcodes_query = """
 SELECT DISTINCT SubCode, subcode_label, WorkSheetName
-FROM dim_tac_subcodes
-WHERE WorkSheetName = 'TAC13 Intangibles'
-   OR LOWER(subcode_label) LIKE '%software%'
-   OR LOWER(subcode_label) LIKE '%licence%'
-   OR LOWER(subcode_label) LIKE '%license%'
+FROM intangible_code_universe
 ORDER BY WorkSheetName, SubCode
 """
 
@@ -99,7 +100,7 @@ print(f"\nFound {len(intangible_subcodes)} intangible asset subcodes:")
 print(intangible_subcodes.head(20).to_string(index=False))
 if len(intangible_subcodes) > 20:
     print(f"... and {len(intangible_subcodes) - 20} more")
-intangible_subcodes.to_csv(OUTPUT_DIR / "03_intangible_subcodes_identified.csv", index=False)
+write_csv(con, intangible_subcodes, OUTPUT_DIR / "03_intangible_subcodes_identified.csv")
 
 # ============================================================================
 # STEP 2: ANALYZE IT SPENDING
@@ -110,9 +111,7 @@ print("=" * 80)
 
 # Get all IT-related spending from fact table
 if len(it_subcodes) > 0:
-    it_codes_list = "', '".join(it_subcodes['SubCode'].tolist())
-
-    it_spending_query = f"""
+    it_spending_query = """
     SELECT
         f.fy,
         f.sector,
@@ -122,31 +121,34 @@ if len(it_subcodes) > 0:
         SUM(f.amount) as total_amount,
         AVG(f.amount) as avg_amount,
         COUNT(DISTINCT f.org_name_raw) as num_orgs
-    FROM fact_tru_tac f
+    FROM v_fact_it f
     JOIN dim_tac_subcodes d ON f.SubCode = d.SubCode AND f.fy = d.fy
-    WHERE f.SubCode IN ('{it_codes_list}')
     GROUP BY f.fy, f.sector, d.subcode_label, d.WorkSheetName
     ORDER BY f.fy, total_amount DESC
     """
 
-    it_spending = con.execute(it_spending_query).fetchdf()
-    print(f"\nIT Spending Data Points: {len(it_spending)}")
+    # Kept as an Arrow table: DuckDB re-queries it below without a pandas
+    # round trip, and only the rows being printed are converted
+    it_spending = con.execute(it_spending_query).fetch_arrow_table()
+    print(f"\nIT Spending Data Points: {it_spending.num_rows}")
     print("\nTop IT spending categories:")
-    print(it_spending.head(20).to_string(index=False))
-    it_spending.to_csv(OUTPUT_DIR / "04_it_spending_detail.csv", index=False)
+    print(it_spending.slice(0, 20).to_pandas().to_string(index=False))
+    write_csv(con, it_spending, OUTPUT_DIR / "04_it_spending_detail.csv")
 
     # Aggregate by year
-    it_by_year = it_spending.groupby('fy').agg({
-        'total_amount': 'sum',
-        'record_count': 'sum'
-    }).reset_index()
-    it_by_year.columns = ['fy', 'total_it_spend', 'record_count']
+    con.register('it_spending', it_spending)
+    it_by_year = con.execute("""
+    SELECT fy, SUM(total_amount) AS total_it_spend, SUM(record_count)::BIGINT AS record_count
+    FROM it_spending
+    GROUP BY fy
+    ORDER BY fy
+    """).fetchdf()
     print("\nIT Spending by Year:")
     print(it_by_year.to_string(index=False))
-    it_by_year.to_csv(OUTPUT_DIR / "05_it_spending_by_year.csv", index=False)
+    write_csv(con, it_by_year, OUTPUT_DIR / "05_it_spending_by_year.csv")
 
     # Visualize IT spending over time
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 6))
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 6), layout='constrained')
 
     # Total IT spend by year
     ax1.plot(range(len(it_by_year)), it_by_year['total_it_spend'] / 1e6,
@@ -165,10 +167,14 @@ if len(it_subcodes) > 0:
                 f'£{v/1e6:.1f}M', ha='center', va='bottom', fontweight='bold')
 
     # IT spend by sector
-    it_by_sector_year = it_spending.groupby(['fy', 'sector'])['total_amount'].sum().reset_index()
-
-    for sector in it_by_sector_year['sector'].unique():
-        sector_data = it_by_sector_year[it_by_sector_year['sector'] == sector]
+    it_by_sector_year = con.execute("""
+    SELECT fy, sector, SUM(total_amount) AS total_amount
+    FROM it_spending
+    GROUP BY fy, sector
+    ORDER BY fy, sector
+    """).fetchdf()
+
+    for sector, sector_data in it_by_sector_year.groupby('sector', sort=False):
         ax2.plot(range(len(sector_data)), sector_data['total_amount'] / 1e6,
                 marker='o', linewidth=2.5, markersize=10, label=sector)
 
@@ -180,8 +186,7 @@ if len(it_subcodes) > 0:
     ax2.legend(title='Sector')
     ax2.grid(axis='y', alpha=0.3)
 
-    plt.tight_layout()
-    plt.savefig(OUTPUT_DIR / "05_it_spending_trends.png", dpi=300, bbox_inches='tight')
+    plt.savefig(OUTPUT_DIR / "05_it_spending_trends.png", dpi=300, pil_kwargs={'compress_level': 3})
     plt.close()
     print(f"\n✓ Saved visualization: 05_it_spending_trends.png")
 
@@ -210,24 +215,26 @@ GROUP BY f.fy, f.sector, d.subcode_label, f.SubCode
 ORDER BY f.fy, total_amount DESC
 """
 
-intangibles = con.execute(intangibles_query).fetchdf()
-print(f"\nIntangible Assets Data Points: {len(intangibles)}")
+intangibles = con.execute(intangibles_query).fetch_arrow_table()
+print(f"\nIntangible Assets Data Points: {intangibles.num_rows}")
 print("\nTop intangible asset categories:")
-print(intangibles.head(20).to_string(index=False))
-intangibles.to_csv(OUTPUT_DIR / "06_intangibles_detail.csv", index=False)
+print(intangibles.slice(0, 20).to_pandas().to_string(index=False))
+write_csv(con, intangibles, OUTPUT_DIR / "06_intangibles_detail.csv")
 
 # Aggregate by year
-intangibles_by_year = intangibles.groupby('fy').agg({
-    'total_amount': 'sum',
-    'record_count': 'sum'
-}).reset_index()
-intangibles_by_year.columns = ['fy', 'total_intangibles_value', 'record_count']
+con.register('intangibles', intangibles)
+intangibles_by_year = con.execute("""
+SELECT fy, SUM(total_amount) AS total_intangibles_value, SUM(record_count)::BIGINT AS record_count
+FROM intangibles
+GROUP BY fy
+ORDER BY fy
+""").fetchdf()
 print("\nIntangible Assets by Year:")
 print(intangibles_by_year.to_string(index=False))
-intangibles_by_year.to_csv(OUTPUT_DIR / "07_intangibles_by_year.csv", index=False)
+write_csv(con, intangibles_by_year, OUTPUT_DIR / "07_intangibles_by_year.csv")
 
 # Visualize
-fig, ax = plt.subplots(figsize=(14, 6))
+fig, ax = plt.subplots(figsize=(14, 6), layout='constrained')
 ax.bar(range(len(intangibles_by_year)), intangibles_by_year['total_intangibles_value'] / 1e6,
        color='#A23B72', edgecolor='black', linewidth=1.5)
 ax.set_xlabel('Financial Year', fontweight='bold', fontsize=12)
@@ -241,8 +248,7 @@ for i, v in enumerate(intangibles_by_year['total_intangibles_value']):
     ax.text(i, v / 1e6 + (intangibles_by_year['total_intangibles_value'].max() / 1e6 * 0.02),
             f'£{v/1e6:.1f}M', ha='center', va='bottom', fontweight='bold')
 
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "07_intangibles_values.png", dpi=300, bbox_inches='tight')
+plt.savefig(OUTPUT_DIR / "07_intangibles_values.png", dpi=300, pil_kwargs={'compress_level': 3})
 plt.close()
 print(f"\n✓ Saved visualization: 07_intangibles_values.png")
 
@@ -254,9 +260,7 @@ print("STEP 4: CONSULTANCY SPENDING ANALYSIS")
 print("=" * 80)
 
 if len(consultancy_subcodes) > 0:
-    consultancy_codes_list = "', '".join(consultancy_subcodes['SubCode'].tolist())
-
-    consultancy_query = f"""
+    consultancy_query = """
     SELECT
         f.fy,
         f.sector,
@@ -266,31 +270,32 @@ if len(consultancy_subcodes) > 0:
         SUM(f.amount) as total_amount,
         AVG(f.amount) as avg_amount,
         COUNT(DISTINCT f.org_name_raw) as num_orgs
-    FROM fact_tru_tac f
+    FROM v_fact_consultancy f
     JOIN dim_tac_subcodes d ON f.SubCode = d.SubCode AND f.fy = d.fy
-    WHERE f.SubCode IN ('{consultancy_codes_list}')
     GROUP BY f.fy, f.sector, d.subcode_label, d.WorkSheetName
     ORDER BY f.fy, total_amount DESC
     """
 
-    consultancy_spending = con.execute(consultancy_query).fetchdf()
-    print(f"\nConsultancy Spending Data Points: {len(consultancy_spending)}")
+    consultancy_spending = con.execute(consultancy_query).fetch_arrow_table()
+    print(f"\nConsultancy Spending Data Points: {consultancy_spending.num_rows}")
     print("\nConsultancy spending categories:")
-    print(consultancy_spending.to_string(index=False))
-    consultancy_spending.to_csv(OUTPUT_DIR / "08_consultancy_detail.csv", index=False)
+    print(consultancy_spending.to_pandas().to_string(index=False))
+    write_csv(con, consultancy_spending, OUTPUT_DIR / "08_consultancy_detail.csv")
 
     # Aggregate by year
-    consultancy_by_year = consultancy_spending.groupby('fy').agg({
-        'total_amount': 'sum',
-        'record_count': 'sum'
-    }).reset_index()
-    consultancy_by_year.columns = ['fy', 'total_consultancy_spend', 'record_count']
+    con.register('consultancy_spending', consultancy_spending)
+    consultancy_by_year = con.execute("""
+    SELECT fy, SUM(total_amount) AS total_consultancy_spend, SUM(record_count)::BIGINT AS record_count
+    FROM consultancy_spending
+    GROUP BY fy
+    ORDER BY fy
+    """).fetchdf()
     print("\nConsultancy Spending by Year:")
     print(consultancy_by_year.to_string(index=False))
-    consultancy_by_year.to_csv(OUTPUT_DIR / "09_consultancy_by_year.csv", index=False)
+    write_csv(con, consultancy_by_year, OUTPUT_DIR / "09_consultancy_by_year.csv")
 
     # Visualize
-    fig, ax = plt.subplots(figsize=(14, 6))
+    fig, ax = plt.subplots(figsize=(14, 6), layout='constrained')
     ax.plot(range(len(consultancy_by_year)), consultancy_by_year['total_consultancy_spend'] / 1e6,
             marker='o', linewidth=3, markersize=12, color='#F18F01')
     ax.fill_between(range(len(consultancy_by_year)), consultancy_by_year['total_consultancy_spend'] / 1e6,
@@ -306,8 +311,7 @@ if len(consultancy_subcodes) > 0:
         ax.text(i, v / 1e6 + (consultancy_by_year['total_consultancy_spend'].max() / 1e6 * 0.02),
                 f'£{v/1e6:.1f}M', ha='center', va='bottom', fontweight='bold')
 
-    plt.tight_layout()
-    plt.savefig(OUTPUT_DIR / "09_consultancy_trends.png", dpi=300, bbox_inches='tight')
+    plt.savefig(OUTPUT_DIR / "09_consultancy_trends.png", dpi=300, pil_kwargs={'compress_level': 3})
     plt.close()
     print(f"\n✓ Saved visualization: 09_consultancy_trends.png")
 
@@ -347,10 +351,10 @@ summary_display['it_spend'] = summary_display['it_spend'] / 1e6
 summary_display['intangibles_value'] = summary_display['intangibles_value'] / 1e6
 summary_display['consultancy_spend'] = summary_display['consultancy_spend'] / 1e6
 print(summary_display.to_string(index=False, float_format='%.2f'))
-summary_df.to_csv(OUTPUT_DIR / "10_combined_summary.csv", index=False)
+write_csv(con, summary_df, OUTPUT_DIR / "10_combined_summary.csv")
 
 # Combined visualization
-fig, ax = plt.subplots(figsize=(16, 8))
+fig, ax = plt.subplots(figsize=(16, 8), layout='constrained')
 
 x = range(len(summary_df))
 width = 0.25
@@ -374,8 +378,7 @@ ax.set_xticklabels(summary_df['fy'], rotation=45, ha='right')
 ax.legend(fontsize=11)
 ax.grid(axis='y', alpha=0.3)
 
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "10_combined_summary.png", dpi=300, bbox_inches='tight')
+plt.savefig(OUTPUT_DIR / "10_combined_summary.png", dpi=300, pil_kwargs={'compress_level': 3})
 plt.close()
 print(f"\n✓ Saved visualization: 10_combined_summary.png")
 
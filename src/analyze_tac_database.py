@@ -6,10 +6,15 @@ Run this script on your local machine where the database is located.
 
 import duckdb
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
 import warnings
+
+from _db import write_csv
+
 warnings.filterwarnings('ignore')
 
 # Configuration
@@ -45,6 +50,25 @@ if fact_table is None:
 
 print(f"\nAnalyzing table: {fact_table}")
 
+# Sections 2, 3 and 6 all aggregate the fact table by year and/or sector.
+# Scan it once into a small rollup table and let each section read its slice
+con.execute(f"""
+    CREATE TEMP TABLE fy_sector_rollup AS
+    SELECT
+        GROUPING(fy) as fy_rolled_up,
+        GROUPING(sector) as sector_rolled_up,
+        fy,
+        sector,
+        COUNT(*) as records,
+        COUNT(DISTINCT org_name_raw) as orgs,
+        COUNT(DISTINCT SubCode) as subcodes,
+        COUNT(DISTINCT fy) as years,
+        SUM(amount) as total_amount,
+        AVG(amount) as avg_amount
+    FROM {fact_table}
+    GROUP BY GROUPING SETS ((fy), (sector), (fy, sector))
+""")
+
 # ============================================================================
 # 1. BASIC STATISTICS
 # ============================================================================
@@ -59,8 +83,8 @@ print(f"\nTotal records: {row_count:,}")
 schema = con.execute(f"PRAGMA table_info('{fact_table}')").fetchdf()
 print(f"Total columns: {len(schema)}")
 print("\nColumns:")
-for _, row in schema.iterrows():
-    print(f"  {row['name']:25} {row['type']}")
+for name, col_type in zip(schema['name'], schema['type']):
+    print(f"  {name:25} {col_type}")
 
 # Basic stats
 stats_query = f"""
@@ -92,25 +116,25 @@ print("\n" + "=" * 80)
 print("2. TEMPORAL ANALYSIS")
 print("=" * 80)
 
-by_year = con.execute(f"""
+by_year = con.execute("""
     SELECT
         fy,
-        COUNT(*) as records,
-        COUNT(DISTINCT org_name_raw) as orgs,
-        COUNT(DISTINCT SubCode) as subcodes,
-        SUM(amount) as total_amount,
-        AVG(amount) as avg_amount
-    FROM {fact_table}
-    GROUP BY fy
+        records,
+        orgs,
+        subcodes,
+        total_amount,
+        avg_amount
+    FROM fy_sector_rollup
+    WHERE fy_rolled_up = 0 AND sector_rolled_up = 1
     ORDER BY fy
 """).fetchdf()
 
 print("\nRecords by Financial Year:")
 print(by_year.to_string(index=False))
-by_year.to_csv(OUTPUT_DIR / "02_by_year.csv", index=False)
+write_csv(con, by_year, OUTPUT_DIR / "02_by_year.csv")
 
 # Visualization: Records by year
-fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 5))
+fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 5), layout='constrained')
 
 ax1.bar(range(len(by_year)), by_year['records'], color='steelblue')
 ax1.set_xlabel('Financial Year', fontweight='bold')
@@ -132,8 +156,7 @@ ax2.set_xticks(range(len(by_year)))
 ax2.set_xticklabels(by_year['fy'], rotation=45, ha='right')
 ax2.grid(axis='y', alpha=0.3)
 
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "02_temporal_analysis.png", dpi=300, bbox_inches='tight')
+plt.savefig(OUTPUT_DIR / "02_temporal_analysis.png", dpi=300, pil_kwargs={'compress_level': 3})
 plt.close()
 
 # ============================================================================
@@ -143,25 +166,25 @@ print("\n" + "=" * 80)
 print("3. SECTOR ANALYSIS")
 print("=" * 80)
 
-by_sector = con.execute(f"""
+by_sector = con.execute("""
     SELECT
         sector,
-        COUNT(*) as records,
-        COUNT(DISTINCT org_name_raw) as orgs,
-        COUNT(DISTINCT fy) as years,
-        SUM(amount) as total_amount,
-        AVG(amount) as avg_amount
-    FROM {fact_table}
-    GROUP BY sector
+        records,
+        orgs,
+        years,
+        total_amount,
+        avg_amount
+    FROM fy_sector_rollup
+    WHERE fy_rolled_up = 1 AND sector_rolled_up = 0
     ORDER BY sector
 """).fetchdf()
 
 print("\nRecords by Sector:")
 print(by_sector.to_string(index=False))
-by_sector.to_csv(OUTPUT_DIR / "03_by_sector.csv", index=False)
+write_csv(con, by_sector, OUTPUT_DIR / "03_by_sector.csv")
 
 # Visualization
-fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 5))
+fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 5), layout='constrained')
 
 colors = sns.color_palette("husl", len(by_sector))
 ax1.bar(by_sector['sector'], by_sector['orgs'], color=colors)
@@ -181,8 +204,7 @@ for autotext in autotexts:
     autotext.set_fontsize(12)
 ax2.set_title('Total Amount by Sector', fontweight='bold', fontsize=14)
 
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "03_sector_analysis.png", dpi=300, bbox_inches='tight')
+plt.savefig(OUTPUT_DIR / "03_sector_analysis.png", dpi=300, pil_kwargs={'compress_level': 3})
 plt.close()
 
 # ============================================================================
@@ -207,10 +229,10 @@ by_worksheet = con.execute(f"""
 
 print("\nTop 20 Worksheets by Record Count:")
 print(by_worksheet.to_string(index=False))
-by_worksheet.to_csv(OUTPUT_DIR / "04_by_worksheet.csv", index=False)
+write_csv(con, by_worksheet, OUTPUT_DIR / "04_by_worksheet.csv")
 
 # Visualization
-fig, ax = plt.subplots(figsize=(12, 10))
+fig, ax = plt.subplots(figsize=(12, 10), layout='constrained')
 colors = sns.color_palette("viridis", len(by_worksheet))
 y_pos = range(len(by_worksheet))
 
@@ -225,8 +247,7 @@ ax.grid(axis='x', alpha=0.3)
 for i, v in enumerate(by_worksheet['records']):
     ax.text(v, i, f' {v:,.0f}', va='center', fontweight='bold')
 
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "04_worksheet_analysis.png", dpi=300, bbox_inches='tight')
+plt.savefig(OUTPUT_DIR / "04_worksheet_analysis.png", dpi=300, pil_kwargs={'compress_level': 3})
 plt.close()
 
 # ============================================================================
@@ -252,7 +273,7 @@ top_orgs = con.execute(f"""
 
 print("\nTop 20 Organizations by Record Count:")
 print(top_orgs.to_string(index=False))
-top_orgs.to_csv(OUTPUT_DIR / "05_top_organizations.csv", index=False)
+write_csv(con, top_orgs, OUTPUT_DIR / "05_top_organizations.csv")
 
 # ============================================================================
 # 6. YEAR-OVER-YEAR TRENDS BY SECTOR
@@ -261,40 +282,40 @@ print("\n" + "=" * 80)
 print("6. YEAR-OVER-YEAR TRENDS")
 print("=" * 80)
 
-trends = con.execute(f"""
+trends = con.execute("""
     SELECT
         fy,
         sector,
-        COUNT(*) as records,
-        SUM(amount) as total_amount,
-        AVG(amount) as avg_amount
-    FROM {fact_table}
-    GROUP BY fy, sector
+        records,
+        total_amount,
+        avg_amount
+    FROM fy_sector_rollup
+    WHERE fy_rolled_up = 0 AND sector_rolled_up = 0
     ORDER BY fy, sector
 """).fetchdf()
 
 print("\nTrends by Year and Sector:")
 print(trends.to_string(index=False))
-trends.to_csv(OUTPUT_DIR / "06_trends.csv", index=False)
+write_csv(con, trends, OUTPUT_DIR / "06_trends.csv")
 
 # Visualization
-fig, ax = plt.subplots(figsize=(14, 6))
+fig, ax = plt.subplots(figsize=(14, 6), layout='constrained')
 
-for sector in trends['sector'].unique():
-    sector_data = trends[trends['sector'] == sector]
+# One groupby pass instead of re-filtering trends for every sector
+for sector, sector_data in trends.groupby('sector', sort=False):
     ax.plot(range(len(sector_data)), sector_data['total_amount'] / 1e9,
             marker='o', linewidth=2.5, markersize=10, label=sector)
 
 ax.set_xlabel('Financial Year', fontweight='bold', fontsize=12)
 ax.set_ylabel('Total Amount (£ Billions)', fontweight='bold', fontsize=12)
 ax.set_title('Financial Trends by Sector Over Time', fontweight='bold', fontsize=14, pad=20)
-ax.set_xticks(range(len(trends['fy'].unique())))
-ax.set_xticklabels(sorted(trends['fy'].unique()), rotation=45, ha='right')
+trend_fys = sorted(trends['fy'].unique())
+ax.set_xticks(range(len(trend_fys)))
+ax.set_xticklabels(trend_fys, rotation=45, ha='right')
 ax.legend(title='Sector', fontsize=10)
 ax.grid(axis='y', alpha=0.3)
 
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "06_trends_by_sector.png", dpi=300, bbox_inches='tight')
+plt.savefig(OUTPUT_DIR / "06_trends_by_sector.png", dpi=300, pil_kwargs={'compress_level': 3})
 plt.close()
 
 # ============================================================================
@@ -319,7 +340,7 @@ for col in ['org_name_raw', 'fy', 'sector', 'WorkSheetName', 'SubCode', 'amount'
 quality_df = pd.DataFrame(quality_checks)
 print("\nData Quality Checks:")
 print(quality_df.to_string(index=False))
-quality_df.to_csv(OUTPUT_DIR / "07_data_quality.csv", index=False)
+write_csv(con, quality_df, OUTPUT_DIR / "07_data_quality.csv")
 
 # ============================================================================
 # 8. EXECUTIVE SUMMARY
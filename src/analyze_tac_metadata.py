@@ -5,6 +5,8 @@ Analyzes the TAC schema, providers, and evolution over time.
 """
 
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
@@ -20,8 +22,11 @@ print("=" * 80)
 
 # Load mapping files
 print("\n[1/5] Loading mapping files...")
-providers = pd.read_csv("mappings/dim_provider.csv")
-tac_subcodes = pd.read_csv("mappings/dim_tac_subcodes_by_year.csv")
+# Low-cardinality text columns load as categoricals, so the groupbys and
+# value counts below hash small integer codes instead of strings
+providers = pd.read_csv("mappings/dim_provider.csv", dtype={'sector': 'category'})
+tac_subcodes = pd.read_csv("mappings/dim_tac_subcodes_by_year.csv",
+                           dtype={'fy': 'category', 'WorkSheetName': 'category'})
 tac_lines = pd.read_csv("mappings/dim_tac_lines_seed.csv")
 
 print(f"  ✓ Loaded {len(providers)} providers")
@@ -62,7 +67,8 @@ print("\n" + "=" * 80)
 print("[3/5] TAC STRUCTURE ANALYSIS")
 print("=" * 80)
 
-print(f"\nFinancial years covered: {sorted(tac_subcodes['fy'].unique())}")
+all_fy = sorted(tac_subcodes['fy'].unique())
+print(f"\nFinancial years covered: {all_fy}")
 
 # Worksheet analysis
 print(f"\nUnique worksheets across all years:")
@@ -117,7 +123,6 @@ print("=" * 80)
 
 # Find subcodes that changed over time
 subcode_years = tac_subcodes.groupby('SubCode')['fy'].apply(list).to_dict()
-all_fy = sorted(tac_subcodes['fy'].unique())
 
 # New subcodes per year
 print(f"\nSchema evolution:")
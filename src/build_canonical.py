@@ -1,8 +1,13 @@
 import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import duckdb
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from _excel import EXCEL_ENGINE
 
 RAW_DIR = Path("Data/raw")
 OUT_PARQUET = Path("Data/canonical/fact_tru_tac.parquet")
@@ -20,7 +25,7 @@ def parse_metadata(filename: str):
 
 def load_all_data(xlsx_path: Path) -> pd.DataFrame:
     # Find the "All data" sheet robustly (case/spacing differences across years)
-    xls = pd.ExcelFile(xlsx_path, engine="openpyxl")
+    xls = pd.ExcelFile(xlsx_path, engine=EXCEL_ENGINE)
     sheets = xls.sheet_names
 
     def norm_sheet(s: str) -> str:
@@ -35,13 +40,15 @@ def load_all_data(xlsx_path: Path) -> pd.DataFrame:
             f"Available sheets: {sheets}"
         )
 
-    df = pd.read_excel(xlsx_path, sheet_name=all_data_sheet, engine="openpyxl")
+    # Read just the header row first; the full sheet is parsed once the
+    # columns we need are known
+    header = xls.parse(all_data_sheet, nrows=0)
 
     # Normalise column names for matching
     def norm(s: str) -> str:
         return re.sub(r"[^a-z0-9]+", "", str(s).strip().lower())
 
-    col_lookup = {norm(c): c for c in df.columns}
+    col_lookup = {norm(c): c for c in header.columns}
 
     # Stable keys (normalised)
     stable_required_norm = ["worksheetname", "tableid", "maincode", "rownumber", "subcode"]
@@ -57,7 +64,7 @@ def load_all_data(xlsx_path: Path) -> pd.DataFrame:
     if missing_stable:
         raise ValueError(
             f"{xlsx_path.name}: missing expected stable columns (normalised): {missing_stable}\n"
-            f"Detected columns: {list(df.columns)}"
+            f"Detected columns: {list(header.columns)}"
         )
 
     # Detect organisation column (prefer specific names)
@@ -71,9 +78,13 @@ def load_all_data(xlsx_path: Path) -> pd.DataFrame:
     if org_col is None or amount_col is None:
         raise ValueError(
             f"{xlsx_path.name}: could not detect org/value columns.\n"
-            f"Detected columns: {list(df.columns)}"
+            f"Detected columns: {list(header.columns)}"
         )
 
+    # Parse only the seven columns the fact table keeps
+    keep = [org_col, amount_col, *stable_cols.values()]
+    df = xls.parse(all_data_sheet, usecols=[header.columns.get_loc(c) for c in keep])
+
     # Standardise to canonical names
     df = df.rename(columns={
         org_col: "org_name_raw",
@@ -97,31 +108,52 @@ def main():
     if not files:
         raise ValueError(f"No TAC_*.xlsx files found in {RAW_DIR.resolve()}")
 
-    all_frames = []
+    # Check every filename before spending time parsing workbooks
+    metadata = [parse_metadata(p.name) for p in files]
+
+    tables = []
 
-    for xlsx_path in files:
-        sector, fy = parse_metadata(xlsx_path.name)
-        df = load_all_data(xlsx_path)
+    # Workbook parsing is CPU-bound, so parse the workbooks in parallel
+    # processes; map() keeps the frames in file order
+    with ProcessPoolExecutor() as ex:
+        loaded = list(ex.map(load_all_data, files))
 
+    for xlsx_path, (sector, fy), df in zip(files, metadata, loaded):
         df["fy"] = fy
         df["sector"] = sector
         df["source_file"] = xlsx_path.name
         df["schema_version"] = fy
 
-        all_frames.append(df)
+        tables.append(pa.Table.from_pandas(df, preserve_index=False))
         print(f"Loaded {xlsx_path.name}: {len(df):,} rows")
 
-    fact = pd.concat(all_frames, ignore_index=True)
-
-    qc = fact.groupby(["fy", "sector"])["amount"].agg(["count", "sum"]).reset_index()
-    print("\nQC summary (rows + total amount by FY/sector):")
-    print(qc.to_string(index=False))
+    # Combine the per-file tables in Arrow rather than with pd.concat, which
+    # would copy every string column once more; permissive promotion widens
+    # types that differ between years (e.g. int64 vs double) as pandas did
+    fact = pa.concat_tables(tables, promote_options="permissive")
 
     OUT_PARQUET.parent.mkdir(parents=True, exist_ok=True)
-    fact.to_parquet(OUT_PARQUET, index=False)
+    pq.write_table(fact, OUT_PARQUET)
 
     con = duckdb.connect(str(OUT_DUCKDB))
-    con.execute("CREATE OR REPLACE TABLE fact_tru_tac AS SELECT * FROM read_parquet(?)", [str(OUT_PARQUET)])
+    con.register("fact", fact)
+
+    qc = con.execute("""
+        SELECT fy, sector, COUNT(amount) AS count, COALESCE(SUM(amount), 0) AS sum
+        FROM fact
+        GROUP BY fy, sector
+        ORDER BY fy, sector
+    """).fetchdf()
+    print("\nQC summary (rows + total amount by FY/sector):")
+    print(qc.to_string(index=False))
+
+    # Store rows clustered by year, worksheet and SubCode so each row group's
+    # min/max zone maps are narrow and filters on fy, WorkSheetName or SubCode
+    # (which is largely worksheet-specific) skip the rest
+    con.execute(
+        "CREATE OR REPLACE TABLE fact_tru_tac AS SELECT * FROM fact "
+        "ORDER BY fy, WorkSheetName, SubCode"
+    )
     con.close()
 
     print(f"\nWrote: {OUT_PARQUET}")
@@ -0,0 +1,68 @@
+import duckdb
+
+from _codes import IT_LABEL_REGEX
+
+con = duckdb.connect("Data/canonical/tru_tac.duckdb")
+
+# Resolve the IT / consultancy / intangibles SubCode lists once and store them,
+# so analysis scripts can SEMI JOIN a small table instead of re-running the
+# label searches. Labels are lower-cased once so each LIKE '%x%' becomes contains()
+con.execute("""
+CREATE OR REPLACE TEMP VIEW subcode_labels AS
+SELECT DISTINCT
+  SubCode,
+  subcode_label,
+  WorkSheetName,
+  lower(subcode_label) AS subcode_label_lower
+FROM dim_tac_subcodes;
+""")
+
+# Same IT predicate as discover_it_consultancy_codes.py, so the universe
+# matches the it_related_codes.csv list reviewed there
+con.execute(f"""
+CREATE OR REPLACE TABLE it_code_universe AS
+SELECT SubCode, subcode_label, WorkSheetName
+FROM subcode_labels
+WHERE regexp_matches(subcode_label, '{IT_LABEL_REGEX}');
+""")
+
+con.execute("""
+CREATE OR REPLACE TABLE consultancy_code_universe AS
+SELECT SubCode, subcode_label, WorkSheetName
+FROM subcode_labels
+WHERE subcode_label_lower LIKE '%consult%'
+   OR subcode_label_lower LIKE '%advisory%'
+   OR subcode_label_lower LIKE '%professional%';
+""")
+
+con.execute("""
+CREATE OR REPLACE TABLE intangible_code_universe AS
+SELECT SubCode, subcode_label, WorkSheetName
+FROM subcode_labels
+WHERE WorkSheetName = 'TAC13 Intangibles'
+   OR subcode_label_lower LIKE '%software%'
+   OR subcode_label_lower LIKE '%licence%'
+   OR subcode_label_lower LIKE '%license%';
+""")
+
+# Fact rows restricted to each code universe, so analyses select from a view
+# instead of repeating the SubCode filter against fact_tru_tac
+for universe in ("it", "consultancy", "intangible"):
+    con.execute(f"""
+    CREATE OR REPLACE VIEW v_fact_{universe} AS
+    SELECT *
+    FROM fact_tru_tac
+    SEMI JOIN {universe}_code_universe USING (SubCode);
+    """)
+
+# Quick QC summary
+df = con.execute("""
+SELECT 'it' AS universe, COUNT(*) AS label_rows, COUNT(DISTINCT SubCode) AS subcodes FROM it_code_universe
+UNION ALL
+SELECT 'consultancy', COUNT(*), COUNT(DISTINCT SubCode) FROM consultancy_code_universe
+UNION ALL
+SELECT 'intangible', COUNT(*), COUNT(DISTINCT SubCode) FROM intangible_code_universe;
+""").fetchdf()
+
+print(df.to_string(index=False))
+con.close()
@@ -2,6 +2,8 @@ import re
 from pathlib import Path
 import pandas as pd
 
+from _excel import EXCEL_ENGINE
+
 REF_DIR = Path("Data/reference")
 OUT_FILE = Path("mappings/dim_tac_lines_by_year.csv")
 OUT_FILE.parent.mkdir(exist_ok=True)
@@ -72,9 +74,9 @@ def main():
         fy = infer_fy_from_filename(path.name)
         print(f"\nProcessing {path.name} (fy={fy})")
 
-        xls = pd.ExcelFile(path, engine="openpyxl")
+        xls = pd.ExcelFile(path, engine=EXCEL_ENGINE)
         for sheet in xls.sheet_names:
-            df = pd.read_excel(path, sheet_name=sheet, engine="openpyxl")
+            df = pd.read_excel(path, sheet_name=sheet, engine=EXCEL_ENGINE)
             extracted = extract_from_sheet(df, sheet, path.name, fy)
             if extracted is not None and len(extracted) > 0:
                 frames.append(extracted)
@@ -2,6 +2,8 @@ import re
 from pathlib import Path
 import pandas as pd
 
+from _excel import EXCEL_ENGINE
+
 RAW_DIR = Path("Data/raw")
 OUT_DIR = Path("mappings")
 OUT_DIR.mkdir(exist_ok=True)
@@ -10,7 +12,7 @@ def norm(s: str) -> str:
     return re.sub(r"[^a-z0-9]+", "", str(s).strip().lower())
 
 def find_mapping_sheet(xlsx_path: Path) -> str:
-    xls = pd.ExcelFile(xlsx_path, engine="openpyxl")
+    xls = pd.ExcelFile(xlsx_path, engine=EXCEL_ENGINE)
     sheets = xls.sheet_names
 
     keywords = [
@@ -104,7 +106,7 @@ def main():
     for xlsx_path in sorted(RAW_DIR.glob("TAC_FTs_*.xlsx")):
         fy = parse_fy(xlsx_path.name)
         sheet = find_mapping_sheet(xlsx_path)
-        df = pd.read_excel(xlsx_path, sheet_name=sheet, engine="openpyxl")
+        df = pd.read_excel(xlsx_path, sheet_name=sheet, engine=EXCEL_ENGINE)
 
         df_std = standardise_mapping_columns(df, xlsx_path.name)
         df_std["fy_source"] = fy
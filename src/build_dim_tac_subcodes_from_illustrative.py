@@ -2,6 +2,8 @@ import re
 from pathlib import Path
 import pandas as pd
 
+from _excel import EXCEL_ENGINE
+
 REF_DIR = Path("Data/reference")
 OUT_FILE = Path("mappings/dim_tac_subcodes_by_year.csv")
 OUT_FILE.parent.mkdir(exist_ok=True)
@@ -69,7 +71,7 @@ def find_header_row_and_subcode_col(df_raw: pd.DataFrame):
 
 
 def extract_sheet_subcodes(xlsx_path: Path, sheet: str, fy: str):
-    df_raw = pd.read_excel(xlsx_path, sheet_name=sheet, engine="openpyxl", header=None)
+    df_raw = pd.read_excel(xlsx_path, sheet_name=sheet, engine=EXCEL_ENGINE, header=None)
 
     hdr_row, subcode_col = find_header_row_and_subcode_col(df_raw)
     if hdr_row is None:
@@ -113,7 +115,7 @@ def main():
 
     for xlsx_path in sorted(REF_DIR.glob("*.xlsx")):
         fy = infer_fy(xlsx_path.name)
-        xls = pd.ExcelFile(xlsx_path, engine="openpyxl")
+        xls = pd.ExcelFile(xlsx_path, engine=EXCEL_ENGINE)
 
         print(f"\nProcessing {xlsx_path.name} (fy={fy})")
 
@@ -0,0 +1,50 @@
+import re
+from pathlib import Path
+
+import pandas as pd
+
+from _excel import EXCEL_ENGINE
+
+RAW_DIR = Path("Data/raw")
+CACHE_DIR = Path("Data/raw_parquet")
+
+# Excel already forbids \ / : * ? [ ] in sheet names but allows < > " |,
+# which Windows does not accept in file names
+UNSAFE_FILENAME_CHARS = re.compile(r'[<>:"/\\|?*]')
+
+
+def cache_path(xlsx_path: Path, sheet: str) -> Path:
+    """Parquet file holding one sheet of a raw workbook."""
+    return CACHE_DIR / Path(xlsx_path).stem / f"{UNSAFE_FILENAME_CHARS.sub('_', sheet)}.parquet"
+
+
+def is_cached(xlsx_path: Path, sheet: str) -> bool:
+    """True if the sheet has a Parquet copy at least as new as the workbook."""
+    cached = cache_path(xlsx_path, sheet)
+    return cached.exists() and cached.stat().st_mtime >= Path(xlsx_path).stat().st_mtime
+
+
+def main():
+    files = sorted(p for p in RAW_DIR.glob("TAC_*.xlsx") if p.is_file())
+    if not files:
+        raise ValueError(f"No TAC_*.xlsx files found in {RAW_DIR.resolve()}")
+
+    for xlsx_path in files:
+        sheets = pd.read_excel(xlsx_path, sheet_name=None, engine=EXCEL_ENGINE)
+
+        for sheet, df in sheets.items():
+            # Parquet needs string column names and one type per column; sheets
+            # mixing text and numbers in a column are kept as text
+            df.columns = [str(c) for c in df.columns]
+            for c in df.columns[df.dtypes == object]:
+                df[c] = df[c].astype("string")
+
+            out = cache_path(xlsx_path, sheet)
+            out.parent.mkdir(parents=True, exist_ok=True)
+            df.to_parquet(out, index=False)
+
+        print(f"Cached {xlsx_path.name}: {len(sheets)} sheets -> {CACHE_DIR / xlsx_path.stem}")
+
+
+if __name__ == "__main__":
+    main()
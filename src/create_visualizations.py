@@ -4,6 +4,8 @@ Create visualizations for NHS TAC data analysis.
 """
 
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
@@ -24,15 +26,23 @@ print("=" * 80)
 
 # Load data
 print("\nLoading data...")
-providers = pd.read_csv("mappings/dim_provider.csv")
-tac_subcodes = pd.read_csv("mappings/dim_tac_subcodes_by_year.csv")
+# Low-cardinality text columns load as categoricals, so the groupbys and
+# value counts below hash small integer codes instead of strings
+providers = pd.read_csv("mappings/dim_provider.csv", dtype={'sector': 'category'})
+tac_subcodes = pd.read_csv("mappings/dim_tac_subcodes_by_year.csv",
+                           dtype={'fy': 'category', 'WorkSheetName': 'category'})
 tac_lines = pd.read_csv("mappings/dim_tac_lines_seed.csv")
 
+# One figure is reused for every chart; it is cleared and resized before each
+fig = plt.figure(layout='constrained')
+
 # ============================================================================
 # Figure 1: Provider Distribution by Sector
 # ============================================================================
 print("  [1/6] Creating provider sector distribution...")
-fig, ax = plt.subplots(figsize=(10, 6))
+fig.clf()
+fig.set_size_inches(10, 6)
+ax = fig.add_subplot(111)
 sector_counts = providers['sector'].value_counts()
 colors = sns.color_palette("husl", len(sector_counts))
 wedges, texts, autotexts = ax.pie(sector_counts.values, labels=sector_counts.index,
@@ -43,27 +53,30 @@ for autotext in autotexts:
     autotext.set_fontsize(12)
 ax.set_title('NHS Provider Distribution by Sector\n(Total: {} providers)'.format(len(providers)),
              fontsize=14, fontweight='bold', pad=20)
-plt.tight_layout()
-plt.savefig(output_dir / "01_provider_sector_distribution.png", dpi=300, bbox_inches='tight')
-plt.close()
+fig.savefig(output_dir / "01_provider_sector_distribution.png", dpi=300, pil_kwargs={'compress_level': 3})
 print(f"    ✓ Saved: {output_dir / '01_provider_sector_distribution.png'}")
 
 # ============================================================================
 # Figure 2: Provider Activity Timeline
 # ============================================================================
 print("  [2/6] Creating provider activity timeline...")
-fig, ax = plt.subplots(figsize=(12, 6))
-
-# Count providers by first and last year
-first_year_counts = providers.groupby('first_fy_seen').size()
-last_year_counts = providers.groupby('last_fy_seen').size()
-
-x = range(len(first_year_counts))
+fig.clf()
+fig.set_size_inches(12, 6)
+ax = fig.add_subplot(111)
+
+# Count providers by first and last year in a single groupby, so both
+# series share the same set of years
+year_counts = (providers[['first_fy_seen', 'last_fy_seen']]
+               .melt(var_name='kind', value_name='fy')
+               .groupby(['fy', 'kind']).size()
+               .unstack(fill_value=0))
+
+x = range(len(year_counts))
 width = 0.35
 
-ax.bar([i - width/2 for i in x], first_year_counts.values, width,
+ax.bar([i - width/2 for i in x], year_counts['first_fy_seen'].values, width,
        label='First Seen', color='#2ecc71')
-ax.bar([i + width/2 for i in x], last_year_counts.values, width,
+ax.bar([i + width/2 for i in x], year_counts['last_fy_seen'].values, width,
        label='Last Seen', color='#e74c3c')
 
 ax.set_xlabel('Financial Year', fontsize=12, fontweight='bold')
@@ -71,20 +84,20 @@ ax.set_ylabel('Number of Providers', fontsize=12, fontweight='bold')
 ax.set_title('Provider Activity Timeline\n(New vs Departing Providers by Year)',
              fontsize=14, fontweight='bold', pad=20)
 ax.set_xticks(x)
-ax.set_xticklabels(first_year_counts.index, rotation=45, ha='right')
+ax.set_xticklabels(year_counts.index, rotation=45, ha='right')
 ax.legend()
 ax.grid(axis='y', alpha=0.3)
 
-plt.tight_layout()
-plt.savefig(output_dir / "02_provider_activity_timeline.png", dpi=300, bbox_inches='tight')
-plt.close()
+fig.savefig(output_dir / "02_provider_activity_timeline.png", dpi=300, pil_kwargs={'compress_level': 3})
 print(f"    ✓ Saved: {output_dir / '02_provider_activity_timeline.png'}")
 
 # ============================================================================
 # Figure 3: SubCode Evolution Over Time
 # ============================================================================
 print("  [3/6] Creating subcode evolution chart...")
-fig, ax = plt.subplots(figsize=(12, 6))
+fig.clf()
+fig.set_size_inches(12, 6)
+ax = fig.add_subplot(111)
 
 subcode_by_fy = tac_subcodes.groupby('fy')['SubCode'].nunique().sort_index()
 
@@ -105,16 +118,16 @@ ax.set_xticks(range(len(subcode_by_fy)))
 ax.set_xticklabels(subcode_by_fy.index, rotation=45, ha='right')
 ax.grid(axis='y', alpha=0.3)
 
-plt.tight_layout()
-plt.savefig(output_dir / "03_subcode_evolution.png", dpi=300, bbox_inches='tight')
-plt.close()
+fig.savefig(output_dir / "03_subcode_evolution.png", dpi=300, pil_kwargs={'compress_level': 3})
 print(f"    ✓ Saved: {output_dir / '03_subcode_evolution.png'}")
 
 # ============================================================================
 # Figure 4: Top Worksheets by SubCode Count
 # ============================================================================
 print("  [4/6] Creating worksheet distribution chart...")
-fig, ax = plt.subplots(figsize=(12, 8))
+fig.clf()
+fig.set_size_inches(12, 8)
+ax = fig.add_subplot(111)
 
 ws_counts = tac_subcodes.groupby('WorkSheetName').size().sort_values(ascending=True).tail(15)
 
@@ -131,16 +144,16 @@ ax.grid(axis='x', alpha=0.3)
 for i, v in enumerate(ws_counts.values):
     ax.text(v + 5, i, str(v), va='center', fontweight='bold', fontsize=9)
 
-plt.tight_layout()
-plt.savefig(output_dir / "04_top_worksheets.png", dpi=300, bbox_inches='tight')
-plt.close()
+fig.savefig(output_dir / "04_top_worksheets.png", dpi=300, pil_kwargs={'compress_level': 3})
 print(f"    ✓ Saved: {output_dir / '04_top_worksheets.png'}")
 
 # ============================================================================
 # Figure 5: TAC Lines by TableID
 # ============================================================================
 print("  [5/6] Creating TAC lines distribution...")
-fig, ax = plt.subplots(figsize=(10, 6))
+fig.clf()
+fig.set_size_inches(10, 6)
+ax = fig.add_subplot(111)
 
 table_counts = tac_lines['TableID'].value_counts().sort_index()
 
@@ -160,16 +173,16 @@ for i, (table_id, count) in enumerate(table_counts.items()):
     ax.text(i, count + 5, f'{count}\n({percentage:.1f}%)',
             ha='center', va='bottom', fontweight='bold', fontsize=10)
 
-plt.tight_layout()
-plt.savefig(output_dir / "05_tac_lines_by_table.png", dpi=300, bbox_inches='tight')
-plt.close()
+fig.savefig(output_dir / "05_tac_lines_by_table.png", dpi=300, pil_kwargs={'compress_level': 3})
 print(f"    ✓ Saved: {output_dir / '05_tac_lines_by_table.png'}")
 
 # ============================================================================
 # Figure 6: SubCode Stability Analysis
 # ============================================================================
 print("  [6/6] Creating subcode stability analysis...")
-fig, ax = plt.subplots(figsize=(12, 6))
+fig.clf()
+fig.set_size_inches(12, 6)
+ax = fig.add_subplot(111)
 
 # Calculate how many years each subcode appears
 all_fy = sorted(tac_subcodes['fy'].unique())
@@ -199,11 +212,11 @@ ax.text(0.98, 0.95, f'Stable (5 years): {stable_count}\nVolatile (1 year): {vola
         bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5),
         fontsize=10, fontweight='bold')
 
-plt.tight_layout()
-plt.savefig(output_dir / "06_subcode_stability.png", dpi=300, bbox_inches='tight')
-plt.close()
+fig.savefig(output_dir / "06_subcode_stability.png", dpi=300, pil_kwargs={'compress_level': 3})
 print(f"    ✓ Saved: {output_dir / '06_subcode_stability.png'}")
 
+plt.close('all')
+
 print("\n" + "=" * 80)
 print(f"ALL VISUALIZATIONS CREATED SUCCESSFULLY")
 print(f"Output directory: {output_dir.absolute()}")
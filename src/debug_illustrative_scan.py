@@ -2,6 +2,8 @@ from pathlib import Path
 import pandas as pd
 import re
 
+from _excel import EXCEL_ENGINE
+
 REF_DIR = Path("Data/reference")
 
 def norm(s):
@@ -14,11 +16,11 @@ KEYWORDS = [norm(x) for x in [
 
 for file in sorted(REF_DIR.glob("*.xlsx")):
     print(f"\n=== {file.name} ===")
-    xls = pd.ExcelFile(file, engine="openpyxl")
+    xls = pd.ExcelFile(file, engine=EXCEL_ENGINE)
 
     for sheet in xls.sheet_names:
         # Read without headers so we can scan raw cells
-        df = pd.read_excel(file, sheet_name=sheet, engine="openpyxl", header=None, nrows=30)
+        df = pd.read_excel(file, sheet_name=sheet, engine=EXCEL_ENGINE, header=None, nrows=30)
         found_rows = []
 
         for r in range(df.shape[0]):
@@ -4,12 +4,13 @@ Discover and list all IT and Consultancy related SubCodes.
 Run this first to verify which codes should be included in the analysis.
 """
 
-import duckdb
 import pandas as pd
 from pathlib import Path
 
+from _codes import IT_LABEL_REGEX
+from _db import DB_PATH, get_con, write_csv
+
 # Configuration
-DB_PATH = Path("Data/canonical/tru_tac.duckdb")
 OUTPUT_DIR = Path("Data/analysis/code_discovery")
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -18,7 +19,108 @@ print("NHS TAC CODE DISCOVERY - IT & CONSULTANCY")
 print("=" * 80)
 print(f"\nConnecting to: {DB_PATH}\n")
 
-con = duckdb.connect(str(DB_PATH), read_only=True)
+con = get_con()
+
+# 2023-24 labels, one per SubCode. The sample queries below aggregate the fact
+# table on its own and pick up labels from this small lookup afterwards,
+# instead of joining dim_tac_subcodes against every fact row
+labels_2023 = con.execute("""
+SELECT SubCode, MAX(subcode_label) as subcode_label
+FROM dim_tac_subcodes
+WHERE fy = '2023-24'
+GROUP BY SubCode
+""").fetchdf().set_index('SubCode')['subcode_label']
+
+# Every code search runs in one query over dim_tac_subcodes; each branch tags
+# its rows with a category and the sections below pick out their own rows
+code_search_query = f"""
+WITH dim AS (
+    SELECT fy, WorkSheetName, SubCode, subcode_label
+    FROM dim_tac_subcodes
+)
+SELECT 'it' as category, SubCode, subcode_label, WorkSheetName, COUNT(DISTINCT fy) as years_present
+FROM dim
+WHERE regexp_matches(subcode_label, '{IT_LABEL_REGEX}')
+GROUP BY SubCode, subcode_label, WorkSheetName
+UNION ALL
+SELECT 'consultancy', SubCode, subcode_label, WorkSheetName, COUNT(DISTINCT fy)
+FROM dim
+WHERE regexp_matches(subcode_label, '(?i)consult|advisory|professional|contractor|outsourc')
+GROUP BY SubCode, subcode_label, WorkSheetName
+UNION ALL
+SELECT 'intangibles', SubCode, subcode_label, WorkSheetName, COUNT(DISTINCT fy)
+FROM dim
+WHERE WorkSheetName = 'TAC13 Intangibles'
+GROUP BY SubCode, subcode_label, WorkSheetName
+UNION ALL
+SELECT 'capital', SubCode, subcode_label, WorkSheetName, COUNT(DISTINCT fy)
+FROM dim
+WHERE (WorkSheetName LIKE '%PPE%' OR WorkSheetName LIKE '%Intangible%')
+  AND regexp_matches(subcode_label, '(?i)addition|purchase|acquisition')
+GROUP BY SubCode, subcode_label, WorkSheetName
+UNION ALL
+SELECT 'opex', SubCode, subcode_label, WorkSheetName, COUNT(DISTINCT fy)
+FROM dim
+WHERE WorkSheetName = 'TAC08 Op Exp'
+  AND regexp_matches(subcode_label, '(?i)it|consult|professional')
+GROUP BY SubCode, subcode_label, WorkSheetName
+ORDER BY category, WorkSheetName, SubCode, subcode_label
+"""
+
+found_codes = con.execute(code_search_query).fetchdf()
+
+# The per-category CSVs below are for review; keep one compressed Parquet of
+# every match, tagged by category, for anything that reads the results back
+con.register('found_codes', found_codes)
+con.execute(f"COPY found_codes TO '{(OUTPUT_DIR / 'discovered_codes.parquet').as_posix()}' "
+            "(FORMAT PARQUET, COMPRESSION ZSTD)")
+
+
+def codes_for(category):
+    """Rows of found_codes for one search category, without the tag column."""
+    codes = found_codes[found_codes['category'] == category]
+    return codes.drop(columns='category').reset_index(drop=True)
+
+
+it_codes = codes_for('it')
+consultancy_codes = codes_for('consultancy')
+intangibles_codes = codes_for('intangibles')
+capital_codes = codes_for('capital').head(20)
+opex_codes = codes_for('opex')
+
+# The IT and consultancy 2023-24 samples come from a single fact scan,
+# joined to the (SubCode, category) pairs found above
+sample_codes = pd.concat([
+    it_codes[['SubCode']].assign(category='it'),
+    consultancy_codes[['SubCode']].assign(category='consultancy'),
+]).drop_duplicates()
+con.register('sample_codes', sample_codes)
+
+code_sample_query = """
+SELECT
+    c.category,
+    f.SubCode,
+    f.WorkSheetName,
+    COUNT(*) as num_records,
+    COUNT(DISTINCT f.org_name_raw) as num_orgs,
+    SUM(f.amount) as total_amount,
+    AVG(f.amount) as avg_amount
+FROM fact_tru_tac f
+JOIN sample_codes c ON f.SubCode = c.SubCode
+WHERE f.fy = '2023-24'
+GROUP BY c.category, f.SubCode, f.WorkSheetName
+ORDER BY total_amount DESC
+"""
+
+code_samples = con.execute(code_sample_query).fetchdf()
+code_samples.insert(2, 'subcode_label', code_samples['SubCode'].map(labels_2023))
+
+
+def sample_for(category):
+    """Rows of code_samples for one search category, without the tag column."""
+    sample = code_samples[code_samples['category'] == category]
+    return sample.drop(columns='category').reset_index(drop=True)
+
 
 # ============================================================================
 # SEARCH FOR IT-RELATED CODES
@@ -27,30 +129,9 @@ print("=" * 80)
 print("1. IT-RELATED SUBCODES")
 print("=" * 80)
 
-it_search_query = """
-SELECT
-    SubCode,
-    subcode_label,
-    WorkSheetName,
-    COUNT(DISTINCT fy) as years_present
-FROM dim_tac_subcodes
-WHERE LOWER(subcode_label) LIKE '%it %'
-   OR LOWER(subcode_label) LIKE '% it%'
-   OR LOWER(subcode_label) LIKE '%digital%'
-   OR LOWER(subcode_label) LIKE '%technology%'
-   OR LOWER(subcode_label) LIKE '%information%'
-   OR LOWER(subcode_label) LIKE '%computer%'
-   OR LOWER(subcode_label) LIKE '%software%'
-   OR LOWER(subcode_label) LIKE '%hardware%'
-   OR LOWER(subcode_label) LIKE '%system%'
-GROUP BY SubCode, subcode_label, WorkSheetName
-ORDER BY WorkSheetName, SubCode
-"""
-
-it_codes = con.execute(it_search_query).fetchdf()
 print(f"\nFound {len(it_codes)} IT-related subcodes:\n")
 print(it_codes.to_string(index=False))
-it_codes.to_csv(OUTPUT_DIR / "it_related_codes.csv", index=False)
+write_csv(con, it_codes, OUTPUT_DIR / "it_related_codes.csv")
 print(f"\n✓ Saved to: {OUTPUT_DIR / 'it_related_codes.csv'}")
 
 # Get sample data for IT codes
@@ -59,27 +140,9 @@ print("Sample spending data for IT codes (2023-24):")
 print("-" * 80)
 
 if len(it_codes) > 0:
-    it_codes_list = "', '".join(it_codes['SubCode'].tolist())
-    it_sample_query = f"""
-    SELECT
-        f.SubCode,
-        d.subcode_label,
-        f.WorkSheetName,
-        COUNT(*) as num_records,
-        COUNT(DISTINCT f.org_name_raw) as num_orgs,
-        SUM(f.amount) as total_amount,
-        AVG(f.amount) as avg_amount
-    FROM fact_tru_tac f
-    LEFT JOIN dim_tac_subcodes d ON f.SubCode = d.SubCode AND f.fy = d.fy
-    WHERE f.SubCode IN ('{it_codes_list}')
-      AND f.fy = '2023-24'
-    GROUP BY f.SubCode, d.subcode_label, f.WorkSheetName
-    ORDER BY total_amount DESC
-    """
-
-    it_sample = con.execute(it_sample_query).fetchdf()
+    it_sample = sample_for('it')
     print(it_sample.to_string(index=False))
-    it_sample.to_csv(OUTPUT_DIR / "it_codes_sample_2023-24.csv", index=False)
+    write_csv(con, it_sample, OUTPUT_DIR / "it_codes_sample_2023-24.csv")
 
 # ============================================================================
 # SEARCH FOR CONSULTANCY CODES
@@ -88,26 +151,9 @@ print("\n" + "=" * 80)
 print("2. CONSULTANCY-RELATED SUBCODES")
 print("=" * 80)
 
-consultancy_search_query = """
-SELECT
-    SubCode,
-    subcode_label,
-    WorkSheetName,
-    COUNT(DISTINCT fy) as years_present
-FROM dim_tac_subcodes
-WHERE LOWER(subcode_label) LIKE '%consult%'
-   OR LOWER(subcode_label) LIKE '%advisory%'
-   OR LOWER(subcode_label) LIKE '%professional%'
-   OR LOWER(subcode_label) LIKE '%contractor%'
-   OR LOWER(subcode_label) LIKE '%outsourc%'
-GROUP BY SubCode, subcode_label, WorkSheetName
-ORDER BY WorkSheetName, SubCode
-"""
-
-consultancy_codes = con.execute(consultancy_search_query).fetchdf()
 print(f"\nFound {len(consultancy_codes)} consultancy-related subcodes:\n")
 print(consultancy_codes.to_string(index=False))
-consultancy_codes.to_csv(OUTPUT_DIR / "consultancy_related_codes.csv", index=False)
+write_csv(con, consultancy_codes, OUTPUT_DIR / "consultancy_related_codes.csv")
 print(f"\n✓ Saved to: {OUTPUT_DIR / 'consultancy_related_codes.csv'}")
 
 # Get sample data for consultancy codes
@@ -116,27 +162,9 @@ print("Sample spending data for consultancy codes (2023-24):")
 print("-" * 80)
 
 if len(consultancy_codes) > 0:
-    consultancy_codes_list = "', '".join(consultancy_codes['SubCode'].tolist())
-    consultancy_sample_query = f"""
-    SELECT
-        f.SubCode,
-        d.subcode_label,
-        f.WorkSheetName,
-        COUNT(*) as num_records,
-        COUNT(DISTINCT f.org_name_raw) as num_orgs,
-        SUM(f.amount) as total_amount,
-        AVG(f.amount) as avg_amount
-    FROM fact_tru_tac f
-    LEFT JOIN dim_tac_subcodes d ON f.SubCode = d.SubCode AND f.fy = d.fy
-    WHERE f.SubCode IN ('{consultancy_codes_list}')
-      AND f.fy = '2023-24'
-    GROUP BY f.SubCode, d.subcode_label, f.WorkSheetName
-    ORDER BY total_amount DESC
-    """
-
-    consultancy_sample = con.execute(consultancy_sample_query).fetchdf()
+    consultancy_sample = sample_for('consultancy')
     print(consultancy_sample.to_string(index=False))
-    consultancy_sample.to_csv(OUTPUT_DIR / "consultancy_codes_sample_2023-24.csv", index=False)
+    write_csv(con, consultancy_sample, OUTPUT_DIR / "consultancy_codes_sample_2023-24.csv")
 
 # ============================================================================
 # SEARCH FOR INTANGIBLE ASSETS (SOFTWARE/IT ASSETS)
@@ -145,22 +173,9 @@ print("\n" + "=" * 80)
 print("3. INTANGIBLE ASSETS (SOFTWARE/IT ON BALANCE SHEET)")
 print("=" * 80)
 
-intangibles_query = """
-SELECT
-    SubCode,
-    subcode_label,
-    WorkSheetName,
-    COUNT(DISTINCT fy) as years_present
-FROM dim_tac_subcodes
-WHERE WorkSheetName = 'TAC13 Intangibles'
-GROUP BY SubCode, subcode_label, WorkSheetName
-ORDER BY SubCode
-"""
-
-intangibles_codes = con.execute(intangibles_query).fetchdf()
 print(f"\nFound {len(intangibles_codes)} intangible asset subcodes:\n")
 print(intangibles_codes.to_string(index=False))
-intangibles_codes.to_csv(OUTPUT_DIR / "intangibles_codes.csv", index=False)
+write_csv(con, intangibles_codes, OUTPUT_DIR / "intangibles_codes.csv")
 print(f"\n✓ Saved to: {OUTPUT_DIR / 'intangibles_codes.csv'}")
 
 # Get sample data
@@ -171,23 +186,22 @@ print("-" * 80)
 intangibles_sample_query = """
 SELECT
     f.SubCode,
-    d.subcode_label,
     COUNT(*) as num_records,
     COUNT(DISTINCT f.org_name_raw) as num_orgs,
     SUM(f.amount) as total_amount,
     AVG(f.amount) as avg_amount
 FROM fact_tru_tac f
-LEFT JOIN dim_tac_subcodes d ON f.SubCode = d.SubCode AND f.fy = d.fy
 WHERE f.WorkSheetName = 'TAC13 Intangibles'
   AND f.fy = '2023-24'
-GROUP BY f.SubCode, d.subcode_label
+GROUP BY f.SubCode
 ORDER BY total_amount DESC
 LIMIT 20
 """
 
 intangibles_sample = con.execute(intangibles_sample_query).fetchdf()
+intangibles_sample.insert(1, 'subcode_label', intangibles_sample['SubCode'].map(labels_2023))
 print(intangibles_sample.to_string(index=False))
-intangibles_sample.to_csv(OUTPUT_DIR / "intangibles_sample_2023-24.csv", index=False)
+write_csv(con, intangibles_sample, OUTPUT_DIR / "intangibles_sample_2023-24.csv")
 
 # ============================================================================
 # ADDITIONAL SEARCHES
@@ -198,47 +212,14 @@ print("=" * 80)
 
 # Search for capital vs revenue
 print("\nSearching for capital expenditure codes...")
-capital_query = """
-SELECT
-    SubCode,
-    subcode_label,
-    WorkSheetName,
-    COUNT(DISTINCT fy) as years_present
-FROM dim_tac_subcodes
-WHERE (WorkSheetName LIKE '%PPE%' OR WorkSheetName LIKE '%Intangible%')
-  AND (LOWER(subcode_label) LIKE '%addition%'
-   OR LOWER(subcode_label) LIKE '%purchase%'
-   OR LOWER(subcode_label) LIKE '%acquisition%')
-GROUP BY SubCode, subcode_label, WorkSheetName
-ORDER BY WorkSheetName, SubCode
-LIMIT 20
-"""
-
-capital_codes = con.execute(capital_query).fetchdf()
 print(f"\nFound {len(capital_codes)} potential capital expenditure codes (showing first 20):\n")
 print(capital_codes.to_string(index=False))
-capital_codes.to_csv(OUTPUT_DIR / "capital_expenditure_codes.csv", index=False)
+write_csv(con, capital_codes, OUTPUT_DIR / "capital_expenditure_codes.csv")
 
 print("\nSearching for operating expense codes...")
-opex_query = """
-SELECT
-    SubCode,
-    subcode_label,
-    WorkSheetName,
-    COUNT(DISTINCT fy) as years_present
-FROM dim_tac_subcodes
-WHERE WorkSheetName = 'TAC08 Op Exp'
-  AND (LOWER(subcode_label) LIKE '%it%'
-   OR LOWER(subcode_label) LIKE '%consult%'
-   OR LOWER(subcode_label) LIKE '%professional%')
-GROUP BY SubCode, subcode_label, WorkSheetName
-ORDER BY SubCode
-"""
-
-opex_codes = con.execute(opex_query).fetchdf()
 print(f"\nFound {len(opex_codes)} IT/consultancy operating expense codes:\n")
 print(opex_codes.to_string(index=False))
-opex_codes.to_csv(OUTPUT_DIR / "opex_it_consultancy_codes.csv", index=False)
+write_csv(con, opex_codes, OUTPUT_DIR / "opex_it_consultancy_codes.csv")
 
 con.close()
 
@@ -257,6 +238,7 @@ print(f"  Operating expense codes: {len(opex_codes)}")
 
 print(f"\n✓ All results saved to: {OUTPUT_DIR.absolute()}")
 print("\nReview the CSV files to verify which codes should be included.")
-print("Once verified, run: python src\\analyze_it_consultancy.py")
+print("Once verified, run: python src\\build_code_universe.py")
+print("           and then: python src\\analyze_it_consultancy.py")
 
 print("\n" + "=" * 80)
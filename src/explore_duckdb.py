@@ -4,11 +4,12 @@ Explore and analyze NHS TAC DuckDB database.
 This script can work with existing databases or help locate them.
 """
 
-import duckdb
 import pandas as pd
 from pathlib import Path
 import sys
 
+from _db import get_con
+
 print("=" * 80)
 print("NHS TAC DuckDB Database Explorer")
 print("=" * 80)
@@ -52,7 +53,7 @@ print("Connecting to database...")
 print('=' * 80)
 
 try:
-    con = duckdb.connect(str(db_path), read_only=True)
+    con = get_con(db_path)
 
     # List all tables
     print("\n[1/5] Database Tables:")
@@ -64,21 +65,24 @@ try:
         print("  ⚠ No tables found in database")
         sys.exit(1)
 
+    # Look up each table's schema and row count once; later sections reuse them
+    schemas = {t: con.execute(f"PRAGMA table_info('{t}')").fetchdf() for t, in tables}
+    row_counts = {t: con.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t, in tables}
+
     # For each table, show structure and sample data
     for table_name, in tables:
         print(f"\n{'=' * 80}")
         print(f"[2/5] Table: {table_name}")
         print('=' * 80)
 
-        # Get row count
-        row_count = con.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+        row_count = row_counts[table_name]
         print(f"\nTotal rows: {row_count:,}")
 
         # Get schema
         print("\nSchema:")
-        schema = con.execute(f"PRAGMA table_info('{table_name}')").fetchdf()
-        for _, row in schema.iterrows():
-            print(f"  {row['name']:25} {row['type']:15} {'NULL' if row['notnull'] == 0 else 'NOT NULL'}")
+        schema = schemas[table_name]
+        for name, col_type, notnull in zip(schema['name'], schema['type'], schema['notnull']):
+            print(f"  {name:25} {col_type:15} {'NULL' if notnull == 0 else 'NOT NULL'}")
 
         # Get sample data
         print("\nSample data (first 5 rows):")
@@ -93,14 +97,28 @@ try:
         # Check for common columns and provide stats
         cols = [c.lower() for c in sample.columns]
 
+        # Record counts by year, sector, worksheet and organisation come from
+        # one GROUPING SETS scan and are split back out per column below
+        group_cols = [c for c in ('fy', 'sector', 'WorkSheetName', 'org_name_raw') if c.lower() in cols]
+        if group_cols:
+            grouped_by = " ".join(f"WHEN GROUPING({c}) = 0 THEN '{c}'" for c in group_cols)
+            rollup = con.execute(f"""
+                SELECT
+                    CASE {grouped_by} END AS grouped_by,
+                    {', '.join(group_cols)},
+                    COUNT(*) as count
+                FROM {table_name}
+                GROUP BY GROUPING SETS ({', '.join(f'({c})' for c in group_cols)})
+            """).fetchdf()
+
         if 'fy' in cols:
             print("\nRecords by Financial Year:")
-            fy_counts = con.execute(f"SELECT fy, COUNT(*) as count FROM {table_name} GROUP BY fy ORDER BY fy").fetchdf()
+            fy_counts = rollup.loc[rollup['grouped_by'] == 'fy', ['fy', 'count']].sort_values('fy')
             print(fy_counts.to_string(index=False))
 
         if 'sector' in cols:
             print("\nRecords by Sector:")
-            sector_counts = con.execute(f"SELECT sector, COUNT(*) as count FROM {table_name} GROUP BY sector ORDER BY sector").fetchdf()
+            sector_counts = rollup.loc[rollup['grouped_by'] == 'sector', ['sector', 'count']].sort_values('sector')
             print(sector_counts.to_string(index=False))
 
         if 'amount' in cols:
@@ -119,24 +137,12 @@ try:
 
         if 'worksheetname' in cols:
             print("\nTop 10 Worksheets by Record Count:")
-            ws_counts = con.execute(f"""
-                SELECT WorkSheetName, COUNT(*) as count
-                FROM {table_name}
-                GROUP BY WorkSheetName
-                ORDER BY count DESC
-                LIMIT 10
-            """).fetchdf()
+            ws_counts = rollup.loc[rollup['grouped_by'] == 'WorkSheetName', ['WorkSheetName', 'count']].sort_values('count', ascending=False).head(10)
             print(ws_counts.to_string(index=False))
 
         if 'org_name_raw' in cols:
             print("\nTop 10 Organizations by Record Count:")
-            org_counts = con.execute(f"""
-                SELECT org_name_raw, COUNT(*) as count
-                FROM {table_name}
-                GROUP BY org_name_raw
-                ORDER BY count DESC
-                LIMIT 10
-            """).fetchdf()
+            org_counts = rollup.loc[rollup['grouped_by'] == 'org_name_raw', ['org_name_raw', 'count']].sort_values('count', ascending=False).head(10)
             print(org_counts.to_string(index=False))
 
     # Data quality checks
@@ -147,13 +153,13 @@ try:
     for table_name, in tables:
         print(f"\nTable: {table_name}")
 
-        # Check for nulls in key columns
-        schema = con.execute(f"PRAGMA table_info('{table_name}')").fetchdf()
-        for _, col_info in schema.iterrows():
-            col_name = col_info['name']
-            null_count = con.execute(f"SELECT COUNT(*) FROM {table_name} WHERE {col_name} IS NULL").fetchone()[0]
+        # Count nulls in every column with a single scan of the table
+        schema = schemas[table_name]
+        null_exprs = ", ".join(f'COUNT(*) - COUNT("{c}")' for c in schema['name'])
+        null_counts = con.execute(f"SELECT {null_exprs} FROM {table_name}").fetchone()
+        for col_name, null_count in zip(schema['name'], null_counts):
             if null_count > 0:
-                null_pct = (null_count / row_count) * 100
+                null_pct = (null_count / row_counts[table_name]) * 100
                 print(f"  ⚠ {col_name}: {null_count:,} nulls ({null_pct:.1f}%)")
 
     # Summary statistics
@@ -162,18 +168,21 @@ try:
     print('=' * 80)
 
     for table_name, in tables:
-        row_count = con.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
-        col_count = len(con.execute(f"PRAGMA table_info('{table_name}')").fetchall())
+        is_fact = 'fact' in table_name.lower() or table_name.lower() == 'tru_tac'
 
         print(f"\n{table_name}:")
-        print(f"  Rows: {row_count:,}")
-        print(f"  Columns: {col_count}")
+        print(f"  Rows: {row_counts[table_name]:,}")
+        print(f"  Columns: {len(schemas[table_name])}")
 
         # If it's the fact table, show more details
-        if 'fact' in table_name.lower() or table_name.lower() == 'tru_tac':
-            distinct_fy = con.execute(f"SELECT COUNT(DISTINCT fy) FROM {table_name}").fetchone()[0]
-            distinct_orgs = con.execute(f"SELECT COUNT(DISTINCT org_name_raw) FROM {table_name}").fetchone()[0]
-            distinct_subcodes = con.execute(f"SELECT COUNT(DISTINCT SubCode) FROM {table_name}").fetchone()[0]
+        if is_fact:
+            distinct_fy, distinct_orgs, distinct_subcodes = con.execute(f"""
+                SELECT
+                    COUNT(DISTINCT fy),
+                    COUNT(DISTINCT org_name_raw),
+                    COUNT(DISTINCT SubCode)
+                FROM {table_name}
+            """).fetchone()
 
             print(f"  Unique Financial Years: {distinct_fy}")
             print(f"  Unique Organizations: {distinct_orgs}")
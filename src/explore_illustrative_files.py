@@ -1,25 +1,24 @@
 #!/usr/bin/env python3
 """Explore the structure of illustrative TAC files."""
 
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import pandas as pd
 
+from _excel import EXCEL_ENGINE
+
 REF_DIR = Path("Data/reference")
 
-print("=" * 80)
-print("NHS TAC Illustrative Files - Structure Exploration")
-print("=" * 80)
 
-for path in sorted(REF_DIR.glob("*.xlsx")):
-    print(f"\n{'=' * 80}")
-    print(f"File: {path.name}")
-    print('=' * 80)
+def inspect_file(path: Path) -> str:
+    """Describe one workbook's sheets and 'All data' preview as printable text."""
+    lines = [f"\n{'=' * 80}", f"File: {path.name}", '=' * 80]
 
     try:
-        xls = pd.ExcelFile(path, engine="openpyxl")
-        print(f"\nSheets ({len(xls.sheet_names)}):")
+        xls = pd.ExcelFile(path, engine=EXCEL_ENGINE)
+        lines.append(f"\nSheets ({len(xls.sheet_names)}):")
         for s in xls.sheet_names:
-            print(f"  - {s}")
+            lines.append(f"  - {s}")
 
         # Try to find and preview the "All data" sheet
         all_data_sheets = [s for s in xls.sheet_names
@@ -27,18 +26,37 @@ for path in sorted(REF_DIR.glob("*.xlsx")):
 
         if all_data_sheets:
             sheet_name = all_data_sheets[0]
-            print(f"\nPreviewing '{sheet_name}' sheet:")
-            df = pd.read_excel(path, sheet_name=sheet_name, nrows=10, engine="openpyxl")
-            print(f"  Shape: {df.shape}")
-            print(f"  Columns ({len(df.columns)}):")
+            lines.append(f"\nPreviewing '{sheet_name}' sheet:")
+            df = pd.read_excel(path, sheet_name=sheet_name, nrows=10, engine=EXCEL_ENGINE)
+            lines.append(f"  Shape: {df.shape}")
+            lines.append(f"  Columns ({len(df.columns)}):")
             for col in df.columns:
-                print(f"    - {col}")
-            print(f"\n  First few rows:")
-            print(df.head(3).to_string())
+                lines.append(f"    - {col}")
+            lines.append(f"\n  First few rows:")
+            lines.append(df.head(3).to_string())
 
     except Exception as e:
-        print(f"  Error reading file: {e}")
+        lines.append(f"  Error reading file: {e}")
+
+    return "\n".join(lines)
+
+
+def main():
+    print("=" * 80)
+    print("NHS TAC Illustrative Files - Structure Exploration")
+    print("=" * 80)
+
+    # openpyxl parsing is CPU-bound Python, so read the workbooks in parallel
+    # processes; map() keeps the report in file order
+    paths = sorted(REF_DIR.glob("*.xlsx"))
+    with ProcessPoolExecutor() as ex:
+        for report in ex.map(inspect_file, paths):
+            print(report)
+
+    print(f"\n{'=' * 80}")
+    print("Exploration complete")
+    print('=' * 80)
+
 
-print(f"\n{'=' * 80}")
-print("Exploration complete")
-print('=' * 80)
+if __name__ == "__main__":
+    main()
@@ -45,22 +45,32 @@ if fact_tables:
     fact_table = fact_tables[0]
     print(f"\n2. Exporting sample from {fact_table}...")
 
-    # Export a stratified sample (1000 rows per FY/sector combination)
-    sample_query = f"""
-        WITH sampled AS (
-            SELECT *, ROW_NUMBER() OVER (PARTITION BY fy, sector ORDER BY RANDOM()) as rn
-            FROM {fact_table}
-        )
-        SELECT * EXCEPT(rn)
-        FROM sampled
-        WHERE rn <= 1000
-    """
-
-    sample_df = con.execute(sample_query).fetchdf()
-    sample_df.to_parquet(OUTPUT_DIR / f"{fact_table}_sample.parquet", index=False)
-    sample_df.to_csv(OUTPUT_DIR / f"{fact_table}_sample.csv", index=False)
-
-    print(f"  Exported {len(sample_df):,} sample rows to:")
+    # Export a stratified sample (1000 rows per FY/sector combination).
+    # Each stratum gets its own reservoir sample, which is a single pass with
+    # a bounded buffer rather than a sort of every row by RANDOM()
+    strata = con.execute(f"SELECT DISTINCT fy, sector FROM {fact_table} ORDER BY fy, sector").fetchall()
+    sample_query = "\n        UNION ALL\n".join(f"""
+        SELECT * FROM (
+            SELECT * FROM {fact_table}
+            WHERE fy IS NOT DISTINCT FROM ? AND sector IS NOT DISTINCT FROM ?
+        ) USING SAMPLE reservoir(1000 ROWS) REPEATABLE (42)""" for _ in strata)
+    sample_params = [value for stratum in strata for value in stratum]
+    if not strata:
+        # Empty fact table: still write the (empty) sample files with the
+        # table's columns rather than COPYing an empty query
+        sample_query = f"SELECT * FROM {fact_table} LIMIT 0"
+
+    # Write the sample straight from DuckDB; the CSV copy is read back from the
+    # Parquet file so both files hold the same random rows
+    sample_parquet = (OUTPUT_DIR / f"{fact_table}_sample.parquet").as_posix()
+    sample_csv = (OUTPUT_DIR / f"{fact_table}_sample.csv").as_posix()
+    sample_rows = con.execute(
+        f"COPY ({sample_query}) TO '{sample_parquet}' (FORMAT PARQUET, COMPRESSION ZSTD)",
+        sample_params,
+    ).fetchone()[0]
+    con.execute(f"COPY (SELECT * FROM read_parquet('{sample_parquet}')) TO '{sample_csv}' (HEADER, DELIMITER ',')")
+
+    print(f"  Exported {sample_rows:,} sample rows to:")
     print(f"    - {OUTPUT_DIR / f'{fact_table}_sample.parquet'}")
     print(f"    - {OUTPUT_DIR / f'{fact_table}_sample.csv'}")
 
@@ -84,8 +94,8 @@ if fact_tables:
         ORDER BY fy, sector, WorkSheetName
     """
 
-    summary_df = con.execute(summary_query).fetchdf()
-    summary_df.to_csv(OUTPUT_DIR / "summary_statistics.csv", index=False)
+    summary_csv = (OUTPUT_DIR / "summary_statistics.csv").as_posix()
+    con.execute(f"COPY ({summary_query}) TO '{summary_csv}' (HEADER, DELIMITER ',')")
     print(f"  Exported summary to: {OUTPUT_DIR / 'summary_statistics.csv'}")
 
 con.close()
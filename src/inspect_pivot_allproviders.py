@@ -1,11 +1,25 @@
+from pathlib import Path
+
 import pandas as pd
 
+from _excel import EXCEL_ENGINE
+from cache_raw_as_parquet import cache_path, is_cached
+
 path = r"Data/raw/TAC_FTs_2023-24.xlsx"
 sheet = "Pivot - data for all providers"
 
-df = pd.read_excel(path, sheet_name=sheet, engine="openpyxl")
+# Prefer the Parquet copy written by cache_raw_as_parquet.py, unless the
+# workbook has changed since it was written. Otherwise read the header and
+# first five rows straight from the workbook. nrows=5 trims the DataFrame
+# pandas builds, but calamine still loads the whole sheet range first, so
+# only openpyxl avoids reading the full sheet
+if is_cached(Path(path), sheet):
+    df = pd.read_parquet(cache_path(Path(path), sheet)).head(5)
+else:
+    df = pd.read_excel(path, sheet_name=sheet, nrows=5, engine=EXCEL_ENGINE)
+
 print("Columns:")
 for c in df.columns:
     print(" -", c)
 print("\nHead:")
-print(df.head(5).to_string(index=False))
+print(df.to_string(index=False))
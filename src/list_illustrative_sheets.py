@@ -1,5 +1,7 @@
 import pandas as pd
 
+from _excel import EXCEL_ENGINE
+
 path = r"Data/reference/1920-nhs-provider-tac-ilustrative-file.xlsx"
-xls = pd.ExcelFile(path, engine="openpyxl")
+xls = pd.ExcelFile(path, engine=EXCEL_ENGINE)
 print("\n".join(xls.sheet_names))
@@ -1,10 +1,16 @@
 from pathlib import Path
-import pandas as pd
+import xml.etree.ElementTree as ET
+import zipfile
 
 RAW_DIR = Path("Data/raw")
 
+# Sheet names live in xl/workbook.xml inside the xlsx zip, so read just that
+# part rather than having a workbook reader parse every sheet
+NS = {"m": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
 for path in sorted(RAW_DIR.glob("TAC_*.xlsx")):
-    xls = pd.ExcelFile(path, engine="openpyxl")
+    with zipfile.ZipFile(path) as z, z.open("xl/workbook.xml") as f:
+        sheet_names = [s.get("name") for s in ET.parse(f).getroot().find("m:sheets", NS)]
     print(f"\n{path.name}")
-    for s in xls.sheet_names:
+    for s in sheet_names:
         print(f"  - {s}")
@@ -6,10 +6,13 @@ OUT_DIR = Path("mappings")
 OUT_DIR.mkdir(exist_ok=True)
 OUT_FILE = OUT_DIR / "dim_tac_lines_seed.csv"
 
-df = pd.read_csv(IN_FILE)
+KEY_COLS = ["TableID", "MainCode", "SubCode", "RowNumber"]
+
+# Only the line key is needed, so parse just those columns
+df = pd.read_csv(IN_FILE, usecols=KEY_COLS)
 
 # Keep only the line key
-keys = df[["TableID", "MainCode", "SubCode", "RowNumber"]].drop_duplicates()
+keys = df[KEY_COLS].drop_duplicates()
 
 # Add classification columns (blank for now)
 keys["line_label"] = ""
@@ -18,7 +21,7 @@ keys["category_2"] = ""
 keys["is_digital_data_it"] = ""
 keys["notes"] = ""
 
-keys = keys.sort_values(["TableID", "MainCode", "SubCode", "RowNumber"])
+keys = keys.sort_values(KEY_COLS)
 
 keys.to_csv(OUT_FILE, index=False)
 print(f"Wrote {OUT_FILE} ({len(keys)} unique lines)")
@@ -1,12 +1,17 @@
-import duckdb
 from pathlib import Path
 
+from _db import get_con
+
 OUT_DIR = Path("mappings")
 OUT_DIR.mkdir(exist_ok=True)
 
-con = duckdb.connect("Data/canonical/tru_tac.duckdb")
+con = get_con()
+
+out = OUT_DIR / "dim_provider_seed.csv"
 
-df = con.execute("""
+# Write the seed straight from DuckDB; COPY returns the row count
+rows = con.execute(f"""
+COPY (
 SELECT
   sector,
   org_name_raw,
@@ -16,10 +21,9 @@ SELECT
 FROM fact_tru_tac
 GROUP BY 1,2
 ORDER BY sector, org_name_raw
-""").fetchdf()
+) TO '{out.as_posix()}' (HEADER, DELIMITER ',');
+""").fetchone()[0]
 
-out = OUT_DIR / "dim_provider_seed.csv"
-df.to_csv(out, index=False)
-print(f"Wrote {out} ({len(df)} rows)")
+print(f"Wrote {out} ({rows} rows)")
 
 con.close()
@@ -1,12 +1,20 @@
-import duckdb
 from pathlib import Path
 
+from _db import get_con
+
 OUT_DIR = Path("outputs")
 OUT_DIR.mkdir(exist_ok=True)
 
-con = duckdb.connect("Data/canonical/tru_tac.duckdb")
+con = get_con()
+# Output order comes from the explicit ORDER BY, so let the window and sort
+# run without also preserving scan order
+con.execute("PRAGMA preserve_insertion_order=false")
+
+out_path = OUT_DIR / "top_750_lines_2023-24.csv"
 
-df = con.execute("""
+# Write the ranked lines straight from DuckDB; COPY returns the row count
+rows = con.execute(f"""
+COPY (
 WITH line_totals AS (
   SELECT
     fy,
@@ -28,12 +36,10 @@ ranked AS (
 SELECT *
 FROM ranked
 WHERE rn <= 750
-ORDER BY sector, rn;
-""").fetchdf()
-
-out_path = OUT_DIR / "top_750_lines_2023-24.csv"
-df.to_csv(out_path, index=False)
+ORDER BY sector, rn
+) TO '{out_path.as_posix()}' (HEADER, DELIMITER ',');
+""").fetchone()[0]
 
-print(f"Wrote {out_path} ({len(df)} rows)")
+print(f"Wrote {out_path} ({rows} rows)")
 
 con.close()
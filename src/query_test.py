@@ -1,6 +1,6 @@
 import duckdb
 
-con = duckdb.connect("Data/canonical/tru_tac.duckdb")
+con = duckdb.connect("Data/canonical/tru_tac.duckdb", read_only=True)
 
 # How many rows total?
 print(con.execute("SELECT COUNT(*) AS rows FROM fact_tru_tac").fetchdf())
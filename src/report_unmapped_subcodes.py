@@ -1,15 +1,20 @@
-import duckdb
 from pathlib import Path
 
+from _db import get_con
+
 OUT_DIR = Path("outputs")
 OUT_DIR.mkdir(exist_ok=True)
 
-con = duckdb.connect("Data/canonical/tru_tac.duckdb")
+con = get_con()
 
 # Ensure enriched table exists
 con.execute("SELECT 1 FROM fact_tru_tac_enriched LIMIT 1;")
 
-df = con.execute("""
+out = OUT_DIR / "top_unmapped_subcodes_by_abs_amount.csv"
+
+# Write the report straight from DuckDB; COPY returns the row count
+rows = con.execute(f"""
+COPY (
 SELECT
   fy,
   sector,
@@ -23,10 +28,9 @@ WHERE is_unmapped=1
   AND fy IN ('2019-20','2020-21','2021-22','2022-23','2023-24')
 GROUP BY 1,2,3,4,5
 ORDER BY abs_amount DESC
-LIMIT 300;
-""").fetchdf()
+LIMIT 300
+) TO '{out.as_posix()}' (HEADER, DELIMITER ',');
+""").fetchone()[0]
 
-out = OUT_DIR / "top_unmapped_subcodes_by_abs_amount.csv"
-df.to_csv(out, index=False)
-print(f"Wrote {out} ({len(df)} rows)")
+print(f"Wrote {out} ({rows} rows)")
 con.close()